@@ -1,11 +1,51 @@
+import contextlib
+import hashlib
 import os
-from PIL import Image, ImageDraw
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+import cv2
+import numpy as np
+import PIL
+from PIL import Image
 
-def is_near_white(pixel, fuzz=50):
-    """Returns True if the pixel is white or close to white."""
-    # Pixel can be (R, G, B) or (R, G, B, A)
-    r, g, b = pixel[:3]
-    return r > (255 - fuzz) and g > (255 - fuzz) and b > (255 - fuzz)
+# Intermediate size for the one-off bilinear downscale (~25% above the largest icon)
+STAGING_DIM = 640
+
+# Where preprocessed (background-removed + trimmed) logos are memoized between runs
+CACHE_DIR = ".cache"
+# Bump whenever remove_background_and_inner_holes changes, so stale cached logos are ignored
+CACHE_VERSION = 2
+
+def _flood(pixels, flood_mask, seed, fuzz):
+    """
+    Flood-fills from `seed` into `flood_mask` with OpenCV (C scanline fill).
+    `pixels` is a signed RGBA copy for the distance math; `flood_mask` is shared
+    across calls, so already-flooded regions act as walls.
+    """
+    x, y = seed
+    if flood_mask[y + 1, x + 1]:
+        return
+    
+    # Like ImageDraw.floodfill: skip seeds already within fuzz of the fill value (0, 0, 0, 0)
+    seed_px = pixels[y, x]
+    if seed_px.sum() <= fuzz:
+        return
+    
+    # Same rule as ImageDraw.floodfill: a pixel joins the fill when its summed
+    # RGBA distance from the seed is <= fuzz. cv2.floodFill only compares per
+    # channel (and on 1 or 3 channels), so flood that precomputed 0/1 map exactly.
+    fillable = (np.abs(pixels - seed_px).sum(axis=2, dtype=np.int16) <= fuzz).astype(np.uint8)
+    flags = 4 | cv2.FLOODFILL_FIXED_RANGE | cv2.FLOODFILL_MASK_ONLY | (255 << 8)
+    cv2.floodFill(fillable, flood_mask, seed, 0, 0, 0, flags)
+
+def _find_handle_hole(arr, flood_mask, fuzz, scan_depth):
+    """Returns the first near-white, still-visible y on the center column, or None."""
+    center_x = arr.shape[1] // 2
+    col = arr[:scan_depth, center_x]
+    visible = (col[:, 3] > 0) & (flood_mask[1:scan_depth + 1, center_x + 1] == 0)
+    mask = (col[:, 0] > 255 - fuzz) & (col[:, 1] > 255 - fuzz) & (col[:, 2] > 255 - fuzz) & visible
+    ys = np.flatnonzero(mask)
+    return int(ys[0]) if ys.size else None
 
 def remove_background_and_inner_holes(img, fuzz=60):
     """
@@ -13,15 +53,18 @@ def remove_background_and_inner_holes(img, fuzz=60):
     2. Scans the top-center to find and remove the 'handle hole'.
     3. Trims the result.
     """
-    img = img.convert("RGBA")
-    width, height = img.size
+    arr = np.array(img.convert("RGBA"))
+    height, width = arr.shape[:2]
+    
+    # Every fill reads the same signed copy and only marks `flood_mask`;
+    # the marked pixels are cleared in a single pass afterwards.
+    pixels = arr.astype(np.int16)
+    flood_mask = np.zeros((height + 2, width + 2), dtype=np.uint8)
     
     # --- STEP 1: REMOVE OUTER BACKGROUND ---
     # Flood from corners
-    ImageDraw.floodfill(img, xy=(0, 0), value=(0, 0, 0, 0), thresh=fuzz)
-    ImageDraw.floodfill(img, xy=(width-1, 0), value=(0, 0, 0, 0), thresh=fuzz)
-    ImageDraw.floodfill(img, xy=(0, height-1), value=(0, 0, 0, 0), thresh=fuzz)
-    ImageDraw.floodfill(img, xy=(width-1, height-1), value=(0, 0, 0, 0), thresh=fuzz)
+    for corner in [(0, 0), (width-1, 0), (0, height-1), (width-1, height-1)]:
+        _flood(pixels, flood_mask, corner, fuzz)
     
     # --- STEP 2: REMOVE HANDLE HOLE (The "Hole Hunter") ---
     # We assume the handle is in the top 30% of the image and centered.
@@ -29,34 +72,98 @@ def remove_background_and_inner_holes(img, fuzz=60):
     center_x = width // 2
     scan_depth = int(height * 0.4) # Scan top 40% only (to avoid hitting the MRT text)
     
-    for y in range(scan_depth):
-        pixel = img.getpixel((center_x, y))
-        
-        # If the pixel is white (and not transparent already)
-        if is_near_white(pixel, fuzz) and pixel[3] > 0:
-            print(f"🎯 Found handle hole at ({center_x}, {y}). Zapping it!")
-            ImageDraw.floodfill(img, xy=(center_x, y), value=(0, 0, 0, 0), thresh=fuzz)
-            break # Stop after finding the first hole so we don't accidentally hit text below
+    # Only take the first hole so we don't accidentally hit text below
+    y = _find_handle_hole(arr, flood_mask, fuzz, scan_depth)
+    if y is not None:
+        print(f"🎯 Found handle hole at ({center_x}, {y}). Zapping it!")
+        _flood(pixels, flood_mask, (center_x, y), fuzz)
+    
+    arr[flood_mask[1:-1, 1:-1] > 0] = 0
             
     # --- STEP 3: TRIM ---
-    bbox = img.getbbox()
-    if bbox:
-        left, top, right, bottom = bbox
-        return img.crop((left-1, top-1, right+1, bottom+1))
+    # Bounding box of the remaining opaque pixels, plus a 1px transparent margin
+    opaque = arr[..., 3] > 0
+    rows = np.flatnonzero(np.any(opaque, axis=1))
+    cols = np.flatnonzero(np.any(opaque, axis=0))
+    if rows.size:
+        arr = np.pad(arr[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1], ((1, 1), (1, 1), (0, 0)))
+    
+    return Image.fromarray(arr, "RGBA")
+
+def load_processed_logo(source_file, fuzz=60):
+    """
+    Returns the background-removed, trimmed logo, reusing a cached .npy copy
+    when the source file, fuzz and CACHE_VERSION are unchanged since the last run.
+    """
+    stat = os.stat(source_file)
+    key = hashlib.sha1(
+        f"{CACHE_VERSION}:{os.path.abspath(source_file)}:{stat.st_mtime_ns}:{stat.st_size}:{fuzz}".encode()
+    ).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"{key}.npy")
+    
+    if os.path.exists(cache_path):
+        try:
+            cached = np.load(cache_path)
+            print(f"♻️  Using cached processed logo ({cache_path})")
+            return Image.fromarray(cached, "RGBA")
+        except (OSError, ValueError) as e:
+            # Unreadable (e.g. truncated) cache entry: fall through and rebuild it
+            print(f"⚠️  Ignoring unreadable cache file {cache_path}: {e}")
+    
+    print(f"Opening {source_file}...")
+    # PROCESS: Remove Background -> Zap Handle -> Trim -> Ready
+    img = remove_background_and_inner_holes(Image.open(source_file), fuzz=fuzz)
+    
+    # Write to a temp file then rename, so an interrupted run never leaves a partial
+    # cache entry. The cache is only an optimization: failing to write it is not fatal.
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(img))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  Could not write cache file {cache_path}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
     
     return img
 
+def _render(task, geom, img, staging, output_dir):
+    """Resizes, centers and saves a single icon. Runs in a worker thread."""
+    filename, size, _ = task
+    new_w, new_h, x_pos, y_pos = geom
+    
+    # The exact 512 icons come straight from the source for full quality
+    source = img if size >= 512 else staging
+    # reducing_gap box-reduces large downscales first, so Lanczos only runs near the
+    # target size. It only takes effect on a premultiplied ("RGBa") source.
+    resized_logo = source.resize((new_w, new_h), Image.Resampling.LANCZOS, reducing_gap=3.0).convert("RGBA")
+    
+    if (new_w, new_h) == (size, size):
+        # Square logo with no padding fills the icon exactly; no canvas needed
+        canvas = resized_logo
+    else:
+        # Write the logo straight into a zeroed (fully transparent) canvas buffer
+        canvas_arr = np.zeros((size, size, 4), dtype=np.uint8)
+        canvas_arr[y_pos:y_pos + new_h, x_pos:x_pos + new_w] = np.asarray(resized_logo)
+        canvas = Image.fromarray(canvas_arr, "RGBA")
+    
+    save_path = os.path.join(output_dir, filename)
+    if filename.endswith(".ico"):
+        canvas.save(save_path, format='ICO', sizes=[(size, size)])
+    else:
+        canvas.save(save_path, format='PNG', compress_level=6)
+        
+    return filename
+
 def generate_pwa_icons(source_file):
     if not os.path.exists(source_file):
         print(f"❌ Error: Could not find '{source_file}'.")
         return
 
     try:
-        print(f"Opening {source_file}...")
-        img = Image.open(source_file)
-        
-        # PROCESS: Remove Background -> Zap Handle -> Trim -> Ready
-        img = remove_background_and_inner_holes(img, fuzz=60)
+        img = load_processed_logo(source_file, fuzz=60)
         print(f"✅ Background & Handle removed. New Size: {img.size}")
         
     except Exception as e:
@@ -76,41 +183,45 @@ def generate_pwa_icons(source_file):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    print(f"🚀 Generating Transparent Icons...")
+    # Pillow premultiplies RGBA on every resize and that internal path ignores
+    # reducing_gap, so premultiply once here and resize in "RGBa" from now on
+    img = img.convert("RGBa")
 
-    for filename, size, padding_pct in icons:
-        # Create clear canvas
-        canvas = Image.new("RGBA", (size, size), (255, 255, 255, 0))
-        
-        # Max size calculation
+    # Bilinear pre-shrink once to ~25% above the largest icon, so the Lanczos
+    # passes below don't each convolve over the full-resolution source.
+    staging = img
+    if max(img.size) > STAGING_DIM:
+        scale = STAGING_DIM / max(img.size)
+        staging_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        staging = img.resize(staging_size, Image.Resampling.BILINEAR)
+
+    # Aspect-Ratio Preserving Resize: the ratio is the same for every icon,
+    # so work out each (new_w, new_h, x_pos, y_pos) up front
+    img_ratio = img.width / img.height
+    is_landscape = img_ratio > 1
+    geoms = []
+    for _, size, padding_pct in icons:
         max_dim = int(size * (1 - padding_pct * 2))
-        
-        # Aspect-Ratio Preserving Resize
-        img_ratio = img.width / img.height
-        if img_ratio > 1:
-            new_w = max_dim
-            new_h = int(max_dim / img_ratio)
+        if is_landscape:
+            new_w, new_h = max_dim, int(max_dim / img_ratio)
         else:
-            new_h = max_dim
-            new_w = int(max_dim * img_ratio)
-            
-        resized_logo = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-        
+            new_w, new_h = int(max_dim * img_ratio), max_dim
         # Center Position
-        x_pos = (size - new_w) // 2
-        y_pos = (size - new_h) // 2
-        
-        canvas.paste(resized_logo, (x_pos, y_pos))
-        
-        save_path = os.path.join(output_dir, filename)
-        if filename.endswith(".ico"):
-            canvas.save(save_path, format='ICO', sizes=[(size, size)])
-        else:
-            canvas.save(save_path, format='PNG', optimize=True)
-            
-        print(f"✅ Created: {filename}")
+        geoms.append((new_w, new_h, (size - new_w) // 2, (size - new_h) // 2))
+
+    print(f"🚀 Generating Transparent Icons...")
+
+    # Threads rather than processes: resize and PNG/ICO encoding release the GIL,
+    # and the source images are shared directly instead of crossing a process boundary
+    with ThreadPoolExecutor(max_workers=min(len(icons), os.cpu_count() or 1)) as ex:
+        for filename in ex.map(_render, icons, geoms, repeat(img), repeat(staging), repeat(output_dir)):
+            print(f"✅ Created: {filename}")
 
     print("\n🎉 Done! The handle hole should now be transparent.")
 
 if __name__ == "__main__":
+    # Lanczos resizing is the hot path here; Pillow-SIMD vectorizes it with SSE4/AVX2.
+    # Install with: pip uninstall pillow && CC="cc -mavx2" pip install pillow-simd
+    if ".post" not in PIL.__version__:
+        print(f"⚠️  Plain Pillow {PIL.__version__} detected. Pillow-SIMD resizes much faster.")
     generate_pwa_icons("Logo.png")
\ No newline at end of file
@@ -1,5 +1,20 @@
 import os
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+# Quality 85 with 4:2:0 chroma is visually lossless for photos
+JPEG_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY, 85,
+    cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 1,
+]
+
+def save_persona(cut):
+    """Encodes one (filename, BGR pixels) cut as JPEG."""
+    filename, persona_pixels = cut
+    if not cv2.imwrite(filename, persona_pixels, JPEG_PARAMS):
+        raise IOError(f"Could not write '{filename}'")
+    return filename
 
 def slice_image_into_quadrants(image_path):
     """
@@ -13,30 +28,31 @@ def slice_image_into_quadrants(image_path):
 
     try:
         print(f"Processing {image_path}...")
-        original_img = Image.open(image_path)
-        width, height = original_img.size
+        # Decode once into a contiguous BGR array; every slice below is a view into it,
+        # not a copy, and stays BGR all the way back out to imwrite. EXIF orientation is
+        # ignored (as PIL's open + crop did) so the quadrants match the stored layout.
+        pixels = cv2.imread(image_path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if pixels is None:
+            print(f"Error: Could not decode '{image_path}'")
+            return
+        height, width = pixels.shape[:2]
         
         # Calculate the midpoints to split the grid perfectly in half
         mid_x = width // 2
         mid_y = height // 2
 
-        # Define the coordinates for the 4 cuts
-        # Box format: (left, upper, right, lower)
+        # Define the 4 cuts as array views: [upper:lower, left:right]
         cuts = {
-            "Ned_The_Pink_Cloud.jpg":  (0, 0, mid_x, mid_y),       # Top Left
-            "Lisa_The_Service_Pro.jpg": (mid_x, 0, width, mid_y),   # Top Right
-            "Walt_The_Zen_Master.jpg":  (0, mid_y, mid_x, height),  # Bottom Left
-            "David_The_Fresh_Start.jpg": (mid_x, mid_y, width, height) # Bottom Right
+            "Ned_The_Pink_Cloud.jpg":    pixels[:mid_y, :mid_x],   # Top Left
+            "Lisa_The_Service_Pro.jpg":  pixels[:mid_y, mid_x:],   # Top Right
+            "Walt_The_Zen_Master.jpg":   pixels[mid_y:, :mid_x],   # Bottom Left
+            "David_The_Fresh_Start.jpg": pixels[mid_y:, mid_x:]    # Bottom Right
         }
 
-        # Process and save each cut
-        for filename, crop_box in cuts.items():
-            # Crop the image
-            persona_img = original_img.crop(crop_box)
-            
-            # Save the file
-            persona_img.save(filename, quality=95)
-            print(f"✅ Created: {filename}")
+        # Save the cuts in parallel; OpenCV releases the GIL while encoding
+        with ThreadPoolExecutor(max_workers=len(cuts)) as ex:
+            for filename in ex.map(save_persona, cuts.items()):
+                print(f"✅ Created: {filename}")
 
         print("\nSuccess! All 4 personas have been extracted.")
 